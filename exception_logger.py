@@ -5,400 +5,601 @@ This module provides a decorator for automatic exception handling and logging wi
 information for all standard Python built-in exceptions.
 """
 
-import functools
+import atexit
+import inspect
+import itertools
+import linecache
+import logging
+import os
 import sys
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Callable, Any, Optional
-import uuid
-
-
-def log_exception(
-    exception_id: str,
-    func_name: str,
-    exc_type: type,
-    exc_value: Exception,
-    exc_info: tuple,
-    logged_args: dict = None
-) -> None:
-    """
-    Log exception details in a structured format.
-
-    Args:
-        exception_id: UUIDv4 string for tracking this exception
-        func_name: Name of the function where exception occurred
-        exc_type: Type of the exception
-        exc_value: The exception instance
-        exc_info: Exception info tuple from sys.exc_info()
-        logged_args: Dictionary of log_this_* arguments to include in log
-    """
-    timestamp = datetime.now(timezone.utc).isoformat()
-
-    # Extract helpful information
-    exc_msg = str(exc_value) if str(exc_value) else "No message provided"
+from types import TracebackType
+from typing import Callable, Any, Dict, Optional, Union
+from random import getrandbits
+
+try:
+    from queue import Empty, SimpleQueue
+except ImportError:  # Python 3.6
+    from queue import Empty, Queue as SimpleQueue
+
+try:
+    from annotationlib import Format
+except ImportError:  # Python < 3.14
+    _SIGNATURE_OPTIONS: Dict[str, Any] = {}
+else:
+    # Only parameter names are needed, so leave unresolvable lazy annotations
+    # (PEP 649) as forward references instead of evaluating them
+    _SIGNATURE_OPTIONS = {"annotation_format": Format.FORWARDREF}
+
+
+# Log records are handed to a background writer thread through a queue, so the
+# raising thread neither renders the final line nor waits on stdout. The writer
+# drains everything queued at once, up to CONSOLE_LOGGING_BUFFER_SIZE records
+# per write, so a burst of exceptions becomes a few large writes.
+_BUFFER_SIZE = int(os.environ.get("CONSOLE_LOGGING_BUFFER_SIZE", "8000"))
+
+
+def _stdout_is_tty() -> bool:
+    """Whether stdout is a terminal, treating odd or missing streams as not one."""
+    isatty = getattr(sys.__stdout__, "isatty", None)
+    if isatty is None:
+        return False
+    try:
+        return bool(isatty())
+    except Exception:
+        return False
+
+
+# On a terminal every batch is flushed so lines show up promptly. When stdout
+# is a pipe or file, batches are left to its block buffering and stdout is
+# only flushed once this many characters are waiting or output goes quiet.
+_STDOUT_IS_TTY = _stdout_is_tty()
+_PIPE_FLUSH_SIZE = 65536
+_PIPE_IDLE_FLUSH = 1.0  # seconds
+
+_log_queue = SimpleQueue()
+_write_lock = threading.Lock()
+_start_lock = threading.Lock()
+_writer_thread = None
+_unflushed = 0
+
+# Child processes write and flush every record as it is logged instead of
+# queueing it: forked children usually leave through os._exit, which skips
+# atexit, and pool workers are often terminated outright. A fork is caught by
+# os.register_at_fork, or by pid on Python 3.6 which lacks it. Spawned and
+# forkserver children import this module fresh, so multiprocessing is asked
+# when the first record is logged.
+_write_inline = False
+_owner_pid = os.getpid()
+_CHECK_PID = not hasattr(os, "register_at_fork")
+
+
+def _write_records(records: list, force: bool) -> None:
+    """Render records and write them to stdout, flushing it when due or forced."""
+    global _unflushed
+
+    lines = []
+    for record in records:
+        try:
+            lines.append(_handler.format(record))
+        except Exception:
+            _handler.handleError(record)
+
+    with _write_lock:
+        if not lines and not (force and _unflushed):
+            return
+
+        stream = sys.__stdout__
+        if stream is None:
+            # No stdout at all (pythonw, detached services), like print() there
+            return
+
+        if lines:
+            # The empty tail gives the trailing newline without copying the
+            # joined batch a second time
+            lines.append("")
+            text = "\n".join(lines)
+            try:
+                stream.write(text)
+            except Exception:
+                # Retry line by line so a line that cannot be written, e.g. one
+                # the stream cannot encode, only loses itself
+                lines.pop()
+                for line in lines:
+                    try:
+                        stream.write(line + "\n")
+                    except Exception:
+                        pass
+            _unflushed += len(text)
+
+        if force or _STDOUT_IS_TTY or _unflushed >= _PIPE_FLUSH_SIZE:
+            try:
+                stream.flush()
+            except Exception:
+                # stdout is closed or broken, there is nowhere left to log to
+                pass
+            _unflushed = 0
+
+
+def _write_now(stream: Any, record: logging.LogRecord) -> None:
+    """Render one record and write it straight to a replacement stdout."""
+    try:
+        line = _handler.format(record)
+    except Exception:
+        _handler.handleError(record)
+        return
 
-    # Get line number from the traceback - need to find the frame in user code
-    # Walk back through the traceback to find the frame outside this module
-    tb = exc_info[2]
-    line_no = "Unknown"
-    filename = "Unknown"
+    if stream is None:
+        return
 
-    if tb:
-        # Get the deepest frame in the traceback (where the exception actually occurred)
-        while tb.tb_next is not None:
-            tb = tb.tb_next
+    with _write_lock:
+        try:
+            stream.write(line + "\n")
+            stream.flush()
+        except Exception:
+            pass
 
-        # Now tb is at the deepest point - where the exception was raised
-        line_no = tb.tb_lineno
-        filename = tb.tb_frame.f_code.co_filename
 
-        # Extract just the filename without full path for cleaner logs
-        import os
+def _write_queued(items: list) -> None:
+    """Write a drained batch, releasing any flush_logs() callers waiting in it."""
+    records = []
+    for item in items:
+        if isinstance(item, logging.LogRecord):
+            records.append(item)
+        else:
+            # A flush_logs() call waiting for everything queued before it,
+            # released even if the write fails so it can never hang
+            try:
+                _write_records(records, force=True)
+            finally:
+                records = []
+                item.set()
 
-        filename = os.path.basename(filename)
+    _write_records(records, force=False)
 
-    # Format logged arguments if present
-    logged_args_str = ""
-    if logged_args:
-        # Sort for consistent ordering in logs
-        sorted_args = sorted(logged_args.items())
-        args_parts = [f"{k}: {v}" for k, v in sorted_args]
-        logged_args_str = f"logged args: {', '.join(args_parts)} - "
-
-    # Format the log message
-    log_msg = (
-        f"{timestamp} - {exception_id} - {func_name} - "
-        f"{logged_args_str}"
-        f"ERROR: {exc_type.__name__}: {exc_msg} (File: {filename}, Line: {line_no})"
-    )
 
-    print(log_msg, file=sys.stdout)
+def _log_writer() -> None:
+    """Background loop that writes queued records to stdout in batches."""
+    while True:
+        try:
+            try:
+                item = _log_queue.get(timeout=_PIPE_IDLE_FLUSH if _unflushed else None)
+            except Empty:
+                # Output went quiet with lines still sitting in stdout's buffer
+                _write_records([], force=True)
+                continue
+
+            batch = [item]
+            try:
+                while len(batch) < _BUFFER_SIZE:
+                    batch.append(_log_queue.get_nowait())
+            except Empty:
+                pass
+
+            _write_queued(batch)
+        except Exception:
+            # The writer must outlive any failure, or the queue would grow unread
+            pass
+
+
+def _in_child_process() -> bool:
+    """Whether this process was started by multiprocessing, by any start method."""
+    mp = sys.modules.get("multiprocessing")
+    if mp is None:
+        return False
+    parent_process = getattr(mp, "parent_process", None)
+    if parent_process is not None:
+        return parent_process() is not None
+    return mp.current_process()._parent_pid is not None  # Python < 3.8
+
+
+def _enqueue(record: logging.LogRecord) -> None:
+    """Hand a record to the writer thread, starting it on first use."""
+    global _writer_thread, _write_inline
+
+    stream = sys.stdout
+    if stream is not sys.__stdout__:
+        # stdout is replaced, e.g. by contextlib.redirect_stdout() or captured
+        # by a test runner, so the line goes to whatever stdout is right now
+        _write_now(stream, record)
+        return
 
+    if _write_inline or (_CHECK_PID and os.getpid() != _owner_pid):
+        _write_records([record], force=True)
+        return
 
-def exception_handler(func: Callable) -> Callable:
+    if _writer_thread is None:
+        with _start_lock:
+            if _writer_thread is None:
+                if _in_child_process():
+                    _write_inline = True
+                    _write_records([record], force=True)
+                    return
+                thread = threading.Thread(
+                    target=_log_writer, name="exception_logger-writer", daemon=True
+                )
+                try:
+                    thread.start()
+                except RuntimeError:
+                    # New threads are refused during interpreter shutdown
+                    _write_records([record], force=True)
+                    return
+                _writer_thread = thread
+
+    _log_queue.put(record)
+
+
+def flush_logs() -> None:
     """
-    Decorator that wraps a function with comprehensive exception handling.
-
-    The decorated function should accept 'exception_id' and 'func_name' as
-    keyword arguments, or they will be auto-generated/detected.
+    Write all queued log lines to stdout and flush it.
 
-    Usage:
-        @exception_handler
-        def my_function(arg1, arg2, exception_id=None, func_name=None):
-            # function code here
+    This runs automatically at interpreter exit. Call it directly when log
+    lines must be visible before continuing (e.g., before os._exit).
     """
+    thread = _writer_thread
+    if thread is not None and thread is not threading.current_thread():
+        # Queue a marker so the writer handles everything ahead of it in order
+        done = threading.Event()
+        _log_queue.put(done)
+        while not done.wait(0.1):
+            if not thread.is_alive():
+                break
+        else:
+            return
 
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Extract or generate tracking information
-        exception_id = kwargs.pop("exception_id", str(uuid.uuid4()))
-        func_name = kwargs.pop("func_name", func.__name__)
-
-        # Extract all log_this_* arguments
-        logged_args = {}
-        keys_to_remove = []
-        for key in kwargs:
-            if key.startswith("log_this_"):
-                # Remove the 'log_this_' prefix for cleaner logging
-                clean_key = key[9:]  # len('log_this_') = 9
-                logged_args[clean_key] = kwargs[key]
-                keys_to_remove.append(key)
-
-        # Remove log_this_* arguments from kwargs
-        for key in keys_to_remove:
-            kwargs.pop(key)
-
-        try:
-            return func(*args, **kwargs)
-
-        #### Concrete exceptions section, starting with most specific
-
-        # System Exit Exceptions
-        except KeyboardInterrupt as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, KeyboardInterrupt, e, exc_info, logged_args)
-            raise
-
-        except SystemExit as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, SystemExit, e, exc_info, logged_args)
-            raise
-
-        # OS and I/O Exceptions
-        except FileNotFoundError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, FileNotFoundError, e, exc_info, logged_args)
-            raise
-
-        except FileExistsError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, FileExistsError, e, exc_info, logged_args)
-            raise
-
-        except IsADirectoryError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, IsADirectoryError, e, exc_info, logged_args)
-            raise
+    # No writer to hand off to, so write whatever is queued from here
+    items = []
+    try:
+        while True:
+            items.append(_log_queue.get_nowait())
+    except Empty:
+        pass
+    _write_queued(items)
+    _write_records([], force=True)
 
-        except NotADirectoryError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, NotADirectoryError, e, exc_info, logged_args)
-            raise
 
-        except PermissionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, PermissionError, e, exc_info, logged_args)
-            raise
+def _reset_after_fork() -> None:
+    """Give a forked child its own empty queue and switch it to inline writes."""
+    global _log_queue, _write_lock, _start_lock, _writer_thread, _unflushed
+    global _write_inline
 
-        except ProcessLookupError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ProcessLookupError, e, exc_info, logged_args)
-            raise
+    _log_queue = SimpleQueue()
+    _write_lock = threading.Lock()
+    _start_lock = threading.Lock()
+    _writer_thread = None
+    _unflushed = 0
+    _write_inline = True
 
-        except TimeoutError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, TimeoutError, e, exc_info, logged_args)
-            raise
 
-        except InterruptedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, InterruptedError, e, exc_info, logged_args)
-            raise
-
-        except ChildProcessError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ChildProcessError, e, exc_info, logged_args)
-            raise
+atexit.register(flush_logs)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-        except BlockingIOError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BlockingIOError, e, exc_info, logged_args)
-            raise
 
-        except ConnectionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionError, e, exc_info, logged_args)
-            raise
+class _BufferedStdoutHandler(logging.Handler):
+    """Logging handler that passes records to the stdout writer thread."""
 
-        except BrokenPipeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BrokenPipeError, e, exc_info, logged_args)
-            raise
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            _enqueue(record)
+        except Exception:
+            self.handleError(record)
 
-        except ConnectionAbortedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionAbortedError, e, exc_info, logged_args)
-            raise
 
-        except ConnectionRefusedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionRefusedError, e, exc_info, logged_args)
-            raise
+# Records go to stdout through _handler, plus any handlers added to this logger
+# (or its parents, with propagate turned on). The level set on this logger is
+# the one way to silence it: it is not inherited from the root logger, and
+# records are passed to the handlers directly, so logging.disable() and loggers
+# disabled by logging.config do not drop them. The name is fixed so it stays
+# the same when this file is vendored into another package.
+_LOGGER_NAME = "exception_logger"
 
-        except ConnectionResetError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionResetError, e, exc_info, logged_args)
-            raise
+_handler = _BufferedStdoutHandler()
+_handler.set_name(_LOGGER_NAME)
+_logger = logging.getLogger(_LOGGER_NAME)
+# Replace rather than add, so importlib.reload does not print every line twice
+for _old_handler in list(_logger.handlers):
+    if _old_handler.get_name() == _LOGGER_NAME:
+        _logger.removeHandler(_old_handler)
+_logger.addHandler(_handler)
+_logger.propagate = False
 
-        except OSError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, OSError, e, exc_info, logged_args)
-            raise
+_LOG_FORMAT = "%s - %s - %s - %sERROR: %s: %s (File: %s, Line: %s)"
 
-        # Arithmetic Exceptions
-        except ZeroDivisionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ZeroDivisionError, e, exc_info, logged_args)
-            raise
+# (unix milliseconds, formatted timestamp) of the last logged exception, so a
+# burst within the same millisecond formats its timestamp only once
+_timestamp_cache = (0, "")
 
-        except FloatingPointError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, FloatingPointError, e, exc_info, logged_args)
-            raise
+# Exception class -> interned class name. type.__name__ builds a new string
+# on every access for built-in exception classes. The cache is emptied once it
+# reaches _EXC_NAMES_LIMIT entries, so classes created at runtime (per request,
+# by factories, or by reloaded modules) are not kept alive forever.
+_EXC_NAMES_LIMIT = 256
+_exc_names: Dict[type, str] = {}
 
-        except OverflowError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, OverflowError, e, exc_info, logged_args)
-            raise
 
-        # Type and Value Exceptions
-        except TypeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, TypeError, e, exc_info, logged_args)
-            raise
+def log_exception(
+    exception_id: Optional[str],
+    func_name: str,
+    exc_type: type,
+    exc_value: Exception,
+    tb: Optional[TracebackType],
+    logged_args: Union[dict, tuple] = (),
+    *,
+    # Module-level names bound once as defaults, making them fast locals here
+    _logger=_logger,
+    _make_record=_logger.makeRecord,
+    _call_handlers=_logger.callHandlers,
+    _name=_logger.name,
+    _ERROR=logging.ERROR,
+    _time=time.time,
+    _fromtimestamp=datetime.fromtimestamp,
+    _utc=timezone.utc,
+    _exc_names=_exc_names,
+    _EXC_NAMES_LIMIT=_EXC_NAMES_LIMIT,
+    _intern=sys.intern,
+    _basename=os.path.basename,
+    _str=str,
+    _getrandbits=getrandbits,
+) -> None:
+    """
+    Log exception details in a structured format.
 
-        except ValueError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ValueError, e, exc_info, logged_args)
-            raise
+    Args:
+        exception_id: Tracking ID for this exception, or None to generate a random
+            32-digit hex ID
+        func_name: Name of the function where exception occurred
+        exc_type: Type of the exception
+        exc_value: The exception instance
+        tb: Traceback of the exception (exc_value.__traceback__), or None
+        logged_args: Dictionary of log_this_* arguments to include in log, already
+            in the order they should appear (the decorators sort them by name),
+            or an empty tuple when there is nothing to log
+    """
+    global _timestamp_cache
 
-        except UnicodeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeError, e, exc_info, logged_args)
-            raise
+    # Skip all formatting work when nobody would see the record
+    if _logger.level > _ERROR:
+        return
 
-        except UnicodeDecodeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeDecodeError, e, exc_info, logged_args)
-            raise
+    # Generated only here, so an ID is never made for a record that is dropped
+    if exception_id is None:
+        exception_id = f"{_getrandbits(128):032x}"
 
-        except UnicodeEncodeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeEncodeError, e, exc_info, logged_args)
-            raise
+    now_ms = int(_time() * 1000)
+    cached_ms, timestamp = _timestamp_cache
+    if now_ms != cached_ms:
+        timestamp = _fromtimestamp(now_ms / 1000, _utc).isoformat(
+            timespec="microseconds"
+        )
+        _timestamp_cache = (now_ms, timestamp)
 
-        except UnicodeTranslateError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeTranslateError, e, exc_info, logged_args)
-            raise
+    # Extract helpful information
+    exc_name = _exc_names.get(exc_type)
+    if exc_name is None:
+        if len(_exc_names) >= _EXC_NAMES_LIMIT:
+            _exc_names.clear()
+        exc_name = _exc_names[exc_type] = _intern(exc_type.__name__)
+    exc_msg = _str(exc_value) or "No message provided"
 
-        # Lookup Exceptions
-        except KeyError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, KeyError, e, exc_info, logged_args)
-            raise
+    # Get line number from the traceback - need to find the frame in user code
+    # Walk back through the traceback to find the frame outside this module
+    line_no = "Unknown"
+    pathname = filename = "Unknown"
 
-        except IndexError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, IndexError, e, exc_info, logged_args)
-            raise
+    if tb is not None:
+        # Get the deepest frame in the traceback (where the exception actually occurred)
+        while tb.tb_next is not None:
+            tb = tb.tb_next
 
-        except AttributeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, AttributeError, e, exc_info, logged_args)
-            raise
+        # Now tb is at the deepest point - where the exception was raised
+        line_no = tb.tb_lineno
+        pathname = tb.tb_frame.f_code.co_filename
 
-        except NameError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, NameError, e, exc_info, logged_args)
-            raise
+        # Extract just the filename without full path for cleaner logs
+        filename = _basename(pathname)
 
-        except UnboundLocalError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnboundLocalError, e, exc_info, logged_args)
-            raise
+    # Format logged arguments if present
+    logged_args_str = ""
+    if logged_args:
+        # One flat list joined once, with no per-argument intermediate strings
+        parts = ["logged args: "]
+        for key, value in logged_args.items():
+            parts += (key, ": ", _str(value), ", ")
+        parts[-1] = " - "
+        logged_args_str = "".join(parts)
+
+    # Build the record directly from the traceback location, which also spares
+    # logging its own caller lookup. The message is %-formatted by the handler.
+    record = _make_record(
+        _name,
+        _ERROR,
+        pathname,
+        line_no,
+        _LOG_FORMAT,
+        (
+            timestamp,
+            exception_id,
+            func_name,
+            logged_args_str,
+            exc_name,
+            exc_msg,
+            filename,
+            line_no,
+        ),
+        None,
+        func=func_name,
+    )
+    _call_handlers(record)
 
-        # Import Exceptions
-        except ModuleNotFoundError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ModuleNotFoundError, e, exc_info, logged_args)
-            raise
 
-        except ImportError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ImportError, e, exc_info, logged_args)
-            raise
+def _update_wrapper(wrapper: Callable, func: Callable) -> Callable:
+    """
+    Copy the identifying metadata of func onto wrapper.
 
-        # Memory and Resource Exceptions
-        except MemoryError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, MemoryError, e, exc_info, logged_args)
-            raise
+    Equivalent to functools.wraps for plain functions, but assigns each
+    attribute directly instead of going through its generic getattr loop.
+    """
+    wrapper.__module__ = func.__module__
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = getattr(func, "__qualname__", func.__name__)
+    wrapper.__doc__ = func.__doc__
+    annotate = getattr(func, "__annotate__", None)
+    if annotate is not None:
+        # Python 3.14+ lazy annotations (PEP 649). Reading __annotations__
+        # would evaluate them now and fail on names not yet defined.
+        wrapper.__annotate__ = annotate
+    else:
+        wrapper.__annotations__ = getattr(func, "__annotations__", {})
+    if hasattr(func, "__type_params__"):
+        # Python 3.12+ generic functions (PEP 695)
+        wrapper.__type_params__ = func.__type_params__
+    wrapper.__dict__.update(getattr(func, "__dict__", {}))
+    wrapper.__wrapped__ = func
+    return wrapper
 
-        except RecursionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, RecursionError, e, exc_info, logged_args)
-            raise
 
-        # Runtime Exceptions
-        except NotImplementedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, NotImplementedError, e, exc_info, logged_args)
-            raise
+# Sentinel for keyword arguments the caller did not pass
+_MISSING = object()
+
+# Keeps the pseudo-filenames of generated wrappers unique in linecache
+_wrapper_ids = itertools.count(1)
+
+# Source for the per-function wrappers built by _build_wrapper. Every
+# log_this_* parameter declared by the wrapped function becomes a keyword-only
+# parameter here, so the interpreter's own argument binding pulls it out of
+# the call instead of a kwargs scan. They are collected in sorted order so the
+# log line needs no sorting. Undeclared log_this_* arguments passed through
+# **kwargs are still picked up by the fallback scan, which restores the order.
+_WRAPPER_TEMPLATE = """\
+def wrapper(*args, exception_id=None, func_name=_func_name{log_params}, **kwargs):
+    logged_args = {{}}
+{collect_log_params}
+    if kwargs:
+        call_kwargs = {{}}
+        for key, value in kwargs.items():
+            if key.startswith("log_this_"):
+                logged_args[key[9:]] = value
+            else:
+                call_kwargs[key] = value
+        if len(call_kwargs) != len(kwargs):
+            logged_args = dict(sorted(logged_args.items()))
+        kwargs = call_kwargs
 
-        except StopIteration as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, StopIteration, e, exc_info, logged_args)
-            raise
+    try:
+        return _func(*args, **kwargs)
+    except BaseException as e:
+        _log(exception_id, func_name, type(e), e, e.__traceback__, logged_args)
+{reraise}
+"""
 
-        except StopAsyncIteration as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, StopAsyncIteration, e, exc_info, logged_args)
-            raise
 
-        except GeneratorExit as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, GeneratorExit, e, exc_info, logged_args)
-            raise
+def _log_this_params(func: Callable) -> list:
+    """Names of the log_this_* parameters that func accepts by keyword."""
+    try:
+        parameters = inspect.signature(func, **_SIGNATURE_OPTIONS).parameters.values()
+    except (TypeError, ValueError, NameError):
+        # No introspectable signature, or annotations that cannot be evaluated
+        # yet, so rely on the kwargs scan alone
+        return []
 
-        # Syntax and Indentation Exceptions
-        except SyntaxError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, SyntaxError, e, exc_info, logged_args)
-            raise
+    keyword_kinds = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+    return [
+        param.name
+        for param in parameters
+        if param.kind in keyword_kinds and param.name.startswith("log_this_")
+    ]
 
-        except IndentationError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, IndentationError, e, exc_info, logged_args)
-            raise
 
-        except TabError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, TabError, e, exc_info, logged_args)
-            raise
+def _plain_wrapper(func: Callable, reraise: bool) -> Callable:
+    """Wrap func without code generation, for signatures with no log_this_* parameters."""
+    # Read once here since a pop() default is evaluated on every call
+    default_func_name = func.__name__
 
-        # System Exceptions
-        except SystemError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, SystemError, e, exc_info, logged_args)
-            raise
+    def wrapper(*args, **kwargs):
+        # Calls without keyword arguments have nothing to extract
+        exception_id = None
+        func_name = default_func_name
+        logged_args = ()
+        if kwargs:
+            exception_id = kwargs.pop("exception_id", None)
+            func_name = kwargs.pop("func_name", default_func_name)
+
+            found = {}
+            call_kwargs = {}
+            for key, value in kwargs.items():
+                if key.startswith("log_this_"):
+                    # Remove the 'log_this_' prefix for cleaner logging
+                    found[key[9:]] = value  # len('log_this_') = 9
+                else:
+                    call_kwargs[key] = value
+            if found:
+                logged_args = dict(sorted(found.items()))
+            kwargs = call_kwargs
 
-        except ReferenceError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ReferenceError, e, exc_info, logged_args)
-            raise
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            log_exception(exception_id, func_name, type(e), e, e.__traceback__, logged_args)
+            if reraise:
+                raise
 
-        # Buffer and EOFError
-        except BufferError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BufferError, e, exc_info, logged_args)
-            raise
+    return _update_wrapper(wrapper, func)
 
-        except EOFError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, EOFError, e, exc_info, logged_args)
-            raise
 
-        # Assertion Error
-        except AssertionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, AssertionError, e, exc_info, logged_args)
-            raise
+def _build_wrapper(func: Callable, reraise: bool) -> Callable:
+    """
+    Generate a wrapper specialized to the signature of func.
 
-        # Runtime Error and Warning
-        except RuntimeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, RuntimeError, e, exc_info, logged_args)
-            raise
+    The source is compiled once at decoration time, so calls only pay for
+    the argument handling that func actually needs. Functions that declare
+    no log_this_* parameters have nothing to specialize and get the plain
+    wrapper from _plain_wrapper instead.
+    """
+    log_params = sorted(_log_this_params(func))
+    if not log_params:
+        return _plain_wrapper(func, reraise)
+
+    source = _WRAPPER_TEMPLATE.format(
+        log_params="".join(f", {name}=_MISSING" for name in log_params),
+        collect_log_params="".join(
+            f"    if {name} is not _MISSING:\n"
+            f"        logged_args[{name[9:]!r}] = {name}\n"
+            for name in log_params
+        ),
+        reraise="        raise" if reraise else "",
+    )
+    namespace = {
+        "_func": func,
+        "_func_name": func.__name__,
+        "_log": log_exception,
+        "_MISSING": _MISSING,
+    }
+    qualname = getattr(func, "__qualname__", func.__name__)
+    filename = f"<exception_logger wrapper for {qualname} #{next(_wrapper_ids)}>"
+    exec(compile(source, filename, "exec"), namespace)
 
-        except RuntimeWarning as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, RuntimeWarning, e, exc_info, logged_args)
-            raise
+    # Make the generated source visible to tracebacks and debuggers
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
 
-        # Lookup Error (parent class - catch after specific lookup errors)
-        except LookupError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, LookupError, e, exc_info, logged_args)
-            raise
+    return _update_wrapper(namespace["wrapper"], func)
 
-        # Arithmetic Error (parent class - catch after specific arithmetic errors)
-        except ArithmeticError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ArithmeticError, e, exc_info, logged_args)
-            raise
 
-        # Base Exception classes (catch last)
-        except Exception as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, Exception, e, exc_info, logged_args)
-            raise
+def exception_handler(func: Callable) -> Callable:
+    """
+    Decorator that wraps a function with comprehensive exception handling.
 
-        except BaseException as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BaseException, e, exc_info, logged_args)
-            raise
+    The decorated function should accept 'exception_id' and 'func_name' as
+    keyword arguments, or they will be auto-generated/detected.
 
-    return wrapper
+    Usage:
+        @exception_handler
+        def my_function(arg1, arg2, exception_id=None, func_name=None):
+            # function code here
+    """
+    return _build_wrapper(func, reraise=True)
 
 
 def exception_handler_quiet(func: Callable) -> Callable:
@@ -406,266 +607,7 @@ def exception_handler_quiet(func: Callable) -> Callable:
     Just like exception_handler except that
     this _quiet version does not re-raise the error.
     """
-
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Extract or generate tracking information
-        exception_id = kwargs.pop("exception_id", str(uuid.uuid4()))
-        func_name = kwargs.pop("func_name", func.__name__)
-
-        # Extract all log_this_* arguments
-        logged_args = {}
-        keys_to_remove = []
-        for key in kwargs:
-            if key.startswith("log_this_"):
-                # Remove the 'log_this_' prefix for cleaner logging
-                clean_key = key[9:]  # len('log_this_') = 9
-                logged_args[clean_key] = kwargs[key]
-                keys_to_remove.append(key)
-
-        # Remove log_this_* arguments from kwargs
-        for key in keys_to_remove:
-            kwargs.pop(key)
-
-        try:
-            return func(*args, **kwargs)
-
-        #### Concrete exceptions section, starting with most specific
-
-        # System Exit Exceptions
-        except KeyboardInterrupt as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, KeyboardInterrupt, e, exc_info, logged_args)
-
-        except SystemExit as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, SystemExit, e, exc_info, logged_args)
-
-        # OS and I/O Exceptions
-        except FileNotFoundError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, FileNotFoundError, e, exc_info, logged_args)
-
-        except FileExistsError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, FileExistsError, e, exc_info, logged_args)
-
-        except IsADirectoryError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, IsADirectoryError, e, exc_info, logged_args)
-
-        except NotADirectoryError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, NotADirectoryError, e, exc_info, logged_args)
-
-        except PermissionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, PermissionError, e, exc_info, logged_args)
-
-        except ProcessLookupError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ProcessLookupError, e, exc_info, logged_args)
-
-        except TimeoutError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, TimeoutError, e, exc_info, logged_args)
-
-        except InterruptedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, InterruptedError, e, exc_info, logged_args)
-
-        except ChildProcessError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ChildProcessError, e, exc_info, logged_args)
-
-        except BlockingIOError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BlockingIOError, e, exc_info, logged_args)
-
-        except ConnectionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionError, e, exc_info, logged_args)
-
-        except BrokenPipeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BrokenPipeError, e, exc_info, logged_args)
-
-        except ConnectionAbortedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionAbortedError, e, exc_info, logged_args)
-
-        except ConnectionRefusedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionRefusedError, e, exc_info, logged_args)
-            raise
-
-        except ConnectionResetError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ConnectionResetError, e, exc_info, logged_args)
-
-        except OSError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, OSError, e, exc_info, logged_args)
-
-        # Arithmetic Exceptions
-        except ZeroDivisionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ZeroDivisionError, e, exc_info, logged_args)
-
-        except FloatingPointError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, FloatingPointError, e, exc_info, logged_args)
-
-        except OverflowError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, OverflowError, e, exc_info, logged_args)
-
-        # Type and Value Exceptions
-        except TypeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, TypeError, e, exc_info, logged_args)
-
-        except ValueError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ValueError, e, exc_info, logged_args)
-
-        except UnicodeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeError, e, exc_info, logged_args)
-
-        except UnicodeDecodeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeDecodeError, e, exc_info, logged_args)
-
-        except UnicodeEncodeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeEncodeError, e, exc_info, logged_args)
-
-        except UnicodeTranslateError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnicodeTranslateError, e, exc_info, logged_args)
-
-        # Lookup Exceptions
-        except KeyError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, KeyError, e, exc_info, logged_args)
-
-        except IndexError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, IndexError, e, exc_info, logged_args)
-
-        except AttributeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, AttributeError, e, exc_info, logged_args)
-
-        except NameError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, NameError, e, exc_info, logged_args)
-
-        except UnboundLocalError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, UnboundLocalError, e, exc_info, logged_args)
-
-        # Import Exceptions
-        except ModuleNotFoundError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ModuleNotFoundError, e, exc_info, logged_args)
-
-        except ImportError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ImportError, e, exc_info, logged_args)
-
-        # Memory and Resource Exceptions
-        except MemoryError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, MemoryError, e, exc_info, logged_args)
-
-        except RecursionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, RecursionError, e, exc_info, logged_args)
-
-        # Runtime Exceptions
-        except NotImplementedError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, NotImplementedError, e, exc_info, logged_args)
-
-        except StopIteration as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, StopIteration, e, exc_info, logged_args)
-
-        except StopAsyncIteration as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, StopAsyncIteration, e, exc_info, logged_args)
-
-        except GeneratorExit as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, GeneratorExit, e, exc_info, logged_args)
-
-        # Syntax and Indentation Exceptions
-        except SyntaxError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, SyntaxError, e, exc_info, logged_args)
-
-        except IndentationError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, IndentationError, e, exc_info, logged_args)
-
-        except TabError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, TabError, e, exc_info, logged_args)
-
-        # System Exceptions
-        except SystemError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, SystemError, e, exc_info, logged_args)
-
-        except ReferenceError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ReferenceError, e, exc_info, logged_args)
-
-        # Buffer and EOFError
-        except BufferError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BufferError, e, exc_info, logged_args)
-
-        except EOFError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, EOFError, e, exc_info, logged_args)
-
-        # Assertion Error
-        except AssertionError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, AssertionError, e, exc_info, logged_args)
-
-        # Runtime Error and Warning
-        except RuntimeError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, RuntimeError, e, exc_info, logged_args)
-
-        except RuntimeWarning as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, RuntimeWarning, e, exc_info, logged_args)
-
-        # Lookup Error (parent class - catch after specific lookup errors)
-        except LookupError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, LookupError, e, exc_info, logged_args)
-
-        # Arithmetic Error (parent class - catch after specific arithmetic errors)
-        except ArithmeticError as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, ArithmeticError, e, exc_info, logged_args)
-
-        # Base Exception classes (catch last)
-        except Exception as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, Exception, e, exc_info, logged_args)
-
-        except BaseException as e:
-            exc_info = sys.exc_info()
-            log_exception(exception_id, func_name, BaseException, e, exc_info, logged_args)
-
-    return wrapper
+    return _build_wrapper(func, reraise=False)
 
 
 # Convenience function for manual exception handling
@@ -681,7 +623,7 @@ def handle_exception(
     format as the decorator.
 
     Args:
-        exception_id: Optional UUID for tracking. Generated if not provided.
+        exception_id: Optional tracking ID. Generated if not provided.
         func_name: Optional function name. Detected from caller if not provided.
         **logged_args: Any additional context to log (e.g., user_id=123, rate=0.5)
 
@@ -697,27 +639,32 @@ def handle_exception(
             )
             raise
     """
-    import inspect
-
     exc_info = sys.exc_info()
     if exc_info[0] is None:
-        print(
-            "Warning: handle_exception called outside of exception context",
-            file=sys.stdout,
-        )
+        if _logger.level <= logging.WARNING:
+            _logger.callHandlers(
+                _logger.makeRecord(
+                    _logger.name,
+                    logging.WARNING,
+                    "(unknown file)",
+                    0,
+                    "Warning: handle_exception called outside of exception context",
+                    (),
+                    None,
+                )
+            )
         return
 
-    if exception_id is None:
-        exception_id = str(uuid.uuid4())
-
     if func_name is None:
-        frame = inspect.currentframe()
-        if frame and frame.f_back:
-            func_name = frame.f_back.f_code.co_name
-        else:
-            func_name = "unknown"
+        func_name = sys._getframe(1).f_code.co_name
+
+    # Keyword arguments arrive in call order, sort them like the decorators do
+    if logged_args:
+        logged_args = dict(sorted(logged_args.items()))
+    else:
+        logged_args = ()
 
-    log_exception(exception_id, func_name, exc_info[0], exc_info[1], exc_info, logged_args)
+    log_exception(exception_id, func_name, exc_info[0], exc_info[1], exc_info[2], logged_args)
 
 
 if __name__ == "__main__":
@@ -758,6 +705,7 @@ if __name__ == "__main__":
     try:
         test_division_by_zero()
     except ZeroDivisionError:
+        flush_logs()
         print("Caught and re-raised as expected\n")
 
     # Test 2: FileNotFoundError
@@ -765,6 +713,7 @@ if __name__ == "__main__":
     try:
         test_file_not_found()
     except FileNotFoundError:
+        flush_logs()
         print("Caught and re-raised as expected\n")
 
     # Test 3: KeyError
@@ -772,18 +721,20 @@ if __name__ == "__main__":
     try:
         test_key_error()
     except KeyError:
+        flush_logs()
         print("Caught and re-raised as expected\n")
 
     # Test 4: Custom exception_id and func_name
     print("Test 4: Custom tracking info")
-    custom_uuid = str(uuid.uuid4())
+    custom_id = f"{getrandbits(128):032x}"
     try:
         test_with_custom_id(
             [1, 2, 3],
-            exception_id=custom_uuid,
+            exception_id=custom_id,
             func_name="custom_function_name",
             log_this_user="frank",
             log_this_rate=0.125,
         )
     except IndexError:
+        flush_logs()
         print("Caught and re-raised as expected\n")
@@ -0,0 +1,244 @@
+"""Behaviour of the logged lines, checked through flush_logs() and real stdout."""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from exception_logger import (  # noqa: E402
+    exception_handler,
+    exception_handler_quiet,
+    flush_logs,
+    handle_exception,
+)
+
+LINE = re.compile(
+    r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}000\+00:00 - (?P<id>\S+) - (?P<func>\S+) - "
+    r"(?:logged args: (?P<args>.*) - )?ERROR: (?P<exc>\w+): (?P<msg>.*) "
+    r"\(File: (?P<file>.+), Line: (?P<line>\d+)\)$"
+)
+
+
+def run_script(source: str) -> list:
+    """Run source as a script file with stdout on a pipe and return its output lines."""
+    env = dict(os.environ)
+    # Keep stdout block buffered, as it is for a real pipe
+    env.pop("PYTHONUNBUFFERED", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "script.py")
+        with open(path, "w") as f:
+            f.write(textwrap.dedent(source))
+        result = subprocess.run(
+            [sys.executable, path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            env=env,
+            timeout=60,
+        )
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout.splitlines()
+
+
+class LogLineTests(unittest.TestCase):
+    def test_line_content_and_argument_order(self):
+        lines = run_script(
+            """
+            from exception_logger import exception_handler_quiet, flush_logs
+
+            @exception_handler_quiet
+            def charge(amount, log_this_user="", log_this_account=""):
+                raise ValueError("card declined")
+
+            charge(10, log_this_user="bob", log_this_account=42, exception_id="id-1")
+            flush_logs()
+            print("after flush")
+            """
+        )
+
+        self.assertEqual(len(lines), 2)
+        match = LINE.match(lines[0])
+        self.assertIsNotNone(match, lines[0])
+        self.assertEqual(match.group("id"), "id-1")
+        self.assertEqual(match.group("func"), "charge")
+        self.assertEqual(match.group("args"), "account: 42, user: bob")
+        self.assertEqual(match.group("exc"), "ValueError")
+        self.assertEqual(match.group("msg"), "card declined")
+        self.assertEqual(match.group("file"), "script.py")
+        self.assertEqual(match.group("line"), "6")
+        self.assertEqual(lines[1], "after flush")
+
+    def test_lines_keep_logging_order(self):
+        lines = run_script(
+            """
+            from exception_logger import exception_handler_quiet, handle_exception
+
+            @exception_handler_quiet
+            def fail(i):
+                raise KeyError(i)
+
+            for i in range(500):
+                fail(i, exception_id=str(i))
+            try:
+                {}["missing"]
+            except KeyError:
+                handle_exception(exception_id="last", b=2, a=1)
+            """
+        )
+
+        matches = [LINE.match(line) for line in lines]
+        self.assertTrue(all(matches), lines)
+        self.assertEqual([m.group("id") for m in matches], [str(i) for i in range(500)] + ["last"])
+        self.assertEqual(matches[-1].group("args"), "a: 1, b: 2")
+        self.assertEqual(matches[-1].group("msg"), "'missing'")
+
+    def test_flush_before_os_exit(self):
+        lines = run_script(
+            """
+            import os
+            from exception_logger import exception_handler_quiet, flush_logs
+
+            @exception_handler_quiet
+            def fail():
+                raise RuntimeError("gone")
+
+            fail()
+            flush_logs()
+            os._exit(0)
+            """
+        )
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(LINE.match(lines[0]).group("msg"), "gone")
+
+
+class RedirectTests(unittest.TestCase):
+    def test_redirect_stdout_captures_lines(self):
+        @exception_handler_quiet
+        def fail():
+            raise ZeroDivisionError("captured")
+
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            fail()
+            try:
+                raise OSError("also captured")
+            except OSError:
+                handle_exception(request="r1")
+        flush_logs()
+
+        lines = buf.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(LINE.match(lines[0]).group("msg"), "captured")
+        self.assertEqual(LINE.match(lines[1]).group("args"), "request: r1")
+
+
+class WrapperTests(unittest.TestCase):
+    def capture(self, func, *args, **kwargs):
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            func(*args, **kwargs)
+        return [LINE.match(line) for line in buf.getvalue().splitlines()]
+
+    def test_declared_and_undeclared_log_this_kwargs(self):
+        received = {}
+
+        @exception_handler_quiet
+        def work(x, log_this_b=None, *, log_this_a=None, **kwargs):
+            received.update(x=x, a=log_this_a, b=log_this_b, kwargs=kwargs)
+            raise ValueError(x)
+
+        self.assertTrue(work.__code__.co_filename.startswith("<exception_logger wrapper for"))
+        self.assertEqual(work.__name__, "work")
+        self.assertIsNotNone(work.__wrapped__)
+
+        matches = self.capture(work, 1, log_this_b=2, log_this_a=3, log_this_c=4, other=5)
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0].group("args"), "a: 3, b: 2, c: 4")
+        # log_this_* keyword arguments are only logged, never passed on
+        self.assertEqual(received, {"x": 1, "a": None, "b": None, "kwargs": {"other": 5}})
+
+        # Declared parameters passed positionally are bound but not logged by name
+        matches = self.capture(work, 6, 7)
+        self.assertIsNone(matches[0].group("args"))
+        self.assertEqual(received["b"], 7)
+
+    def test_undeclared_log_this_kwargs_only(self):
+        @exception_handler_quiet
+        def work(**kwargs):
+            raise ValueError(sorted(kwargs))
+
+        matches = self.capture(
+            work, log_this_z=1, log_this_y=2, exception_id="given", func_name="renamed"
+        )
+        self.assertEqual(matches[0].group("args"), "y: 2, z: 1")
+        self.assertEqual(matches[0].group("id"), "given")
+        self.assertEqual(matches[0].group("func"), "renamed")
+        self.assertEqual(matches[0].group("msg"), "[]")
+
+    def test_reraise(self):
+        @exception_handler
+        def work(log_this_a=None):
+            raise KeyError("k")
+
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf), self.assertRaises(KeyError):
+            work(log_this_a=1)
+        self.assertEqual(LINE.match(buf.getvalue()).group("args"), "a: 1")
+
+
+CHILDREN_SCRIPT = """
+import multiprocessing
+from exception_logger import exception_handler_quiet
+
+@exception_handler_quiet
+def work(i):
+    raise ValueError("worker %d" % i)
+
+if __name__ == "__main__":
+    ctx = multiprocessing.get_context("{method}")
+    processes = [ctx.Process(target=work, args=(i,)) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    with ctx.Pool(2) as pool:
+        pool.map(work, range(10, 14))
+    work(99)
+"""
+
+
+class ChildProcessTests(unittest.TestCase):
+    def check_children(self, method):
+        if method not in multiprocessing.get_all_start_methods():
+            self.skipTest("start method %r is not available" % method)
+
+        lines = run_script(CHILDREN_SCRIPT.format(method=method))
+        messages = sorted(LINE.match(line).group("msg") for line in lines)
+        expected = sorted("worker %d" % i for i in [0, 1, 2, 3, 10, 11, 12, 13, 99])
+        self.assertEqual(messages, expected)
+
+    def test_fork_children(self):
+        self.check_children("fork")
+
+    def test_forkserver_children(self):
+        self.check_children("forkserver")
+
+    def test_spawn_children(self):
+        self.check_children("spawn")
+
+
+if __name__ == "__main__":
+    unittest.main()